@@ -0,0 +1,61 @@
+"""
+file cache module
+stores per-symbol price data on disk with a time-to-live
+"""
+
+import pandas as pd
+import hashlib
+import json
+import time
+from datetime import date
+from typing import Optional, Tuple
+import logging
+from pathlib import Path
+
+from config import YAHOO_FINANCE_CACHE_DAYS
+
+logger = logging.getLogger(__name__)
+
+class FileCache:
+    """caches one price series per (symbol, start date, end date)"""
+    def __init__(self, cache_dir: Path, ttl_days: int = YAHOO_FINANCE_CACHE_DAYS):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_days * 24 * 60 * 60
+
+    def _entry_paths(self, symbol: str, start_date: date, end_date: date) -> Tuple[Path, Path]:
+        """get the data file and timestamp sidecar for a cache entry"""
+        params = f"{symbol}|{start_date.isoformat()}|{end_date.isoformat()}"
+        key = f"{symbol}_{hashlib.md5(params.encode()).hexdigest()}"
+        return self.cache_dir / f"{key}.parquet", self.cache_dir / f"{key}.json"
+
+    def get(self, symbol: str, start_date: date, end_date: date) -> Optional[pd.DataFrame]:
+        """get cached data for a symbol, or None if missing or expired"""
+        data_path, meta_path = self._entry_paths(symbol, start_date, end_date)
+        if not data_path.exists() or not meta_path.exists():
+            return None
+
+        try:
+            meta = json.loads(meta_path.read_text())
+            if time.time() - meta['timestamp'] > self.ttl_seconds:
+                return None
+
+            return pd.read_parquet(data_path)
+        except Exception as e:
+            logger.warning(f"Error reading cache entry for {symbol}: {e}")
+            return None
+
+    def set(self, symbol: str, start_date: date, end_date: date, data: pd.DataFrame) -> None:
+        """cache data for a symbol"""
+        data_path, meta_path = self._entry_paths(symbol, start_date, end_date)
+
+        try:
+            data.to_parquet(data_path, compression='zstd')
+            meta_path.write_text(json.dumps({
+                'symbol': symbol,
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'timestamp': time.time(),
+            }))
+        except Exception as e:
+            logger.error(f"Error caching data for {symbol}: {e}")
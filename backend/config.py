@@ -3,10 +3,14 @@ configuration setting for the portfolio backtesting engine
 central place for all default values and constants
 """
 
-from datetime import datetime
+from datetime import datetime, date
+from functools import lru_cache
+from math import fsum
 from typing import Dict, List, Optional
 from enum import Enum
 
+import numpy as np
+
 class ContributionFrequency(Enum):
     # how often the user contributes to the portfolio
     MONTHLY = "monthly"
@@ -23,7 +27,7 @@ class RebalanceFrequency(Enum):
 
 # default date range for simulation
 DEFAULT_START_DATE = datetime(2000, 1, 1)
-DEFAULT_END_DATE = datetime(2025, 6, 31)
+DEFAULT_END_DATE = datetime(2025, 6, 30)
 
 # default portfolio settings
 DEFAULT_INTIAL_INVESTMENT = 10000
@@ -33,8 +37,11 @@ DEFAULT_REBALANCE_FREQUENCY = RebalanceFrequency.NONE
 
 # data settings
 YAHOO_FINANCE_CACHE_DAYS = 7
+YAHOO_FINANCE_BATCH_SIZE = 10
+YAHOO_FINANCE_MAX_WORKERS = 16
 DATA_DIR = "data"
-ETF_PRICES_FILE = "etf_prices.csv"
+CACHE_DIR = ".cache"
+ETF_PRICES_FILE = "etf_prices.parquet"
 EVENTS_FILE = "events.json"
 
 # performance calculation settings
@@ -76,6 +83,7 @@ SUPPORTED_ETFS = {
     "TLT": "iShares 20+ Year Treasury Bond ETF",
     "BNDX": "Vanguard Total International Bond ETF",
 }
+SUPPORTED_ETFS_SET = frozenset(SUPPORTED_ETFS.keys())
 
 # default portfolio allocation
 DEFAULT_ALLOCATION = {
@@ -85,6 +93,14 @@ DEFAULT_ALLOCATION = {
     "BND": 0.10,
 }
 
+# frozen views of the default allocation for hot code paths
+DEFAULT_ALLOCATION_ITEMS = tuple(DEFAULT_ALLOCATION.items())
+DEFAULT_ALLOCATION_WEIGHTS = np.array([weight for _, weight in DEFAULT_ALLOCATION_ITEMS], dtype=np.float64)
+DEFAULT_ALLOCATION_WEIGHTS.flags.writeable = False
+
+# earliest start date accepted by validate_date_range
+_MIN_START_ORDINAL = date(1990, 1, 1).toordinal()
+
 # event overlay settings
 SIGNIFICANT_EVENTS = [
     {"date": "2006-09-15", "event": "Lehman Brothers Bankruptcy", "type": "crisis"},
@@ -96,11 +112,13 @@ SIGNIFICANT_EVENTS = [
 
 def validate_date_range(start_date: date, end_date:date) -> bool:
     """check if date range is reasonable"""
-    if start_date >= end_date:
+    start_ordinal = start_date.toordinal()
+    end_ordinal = end_date.toordinal()
+    if start_ordinal >= end_ordinal:
         return False
-    if start_date < date(1990, 1, 1):
+    if start_ordinal < _MIN_START_ORDINAL:
         return False
-    if end_date > datetime.today().date():
+    if end_ordinal > date.today().toordinal():
         return False
     return True
 
@@ -108,9 +126,9 @@ def validate_allocation(allocation: Dict[str, float]) -> bool:
     """check if allocation sum up to 100%"""
     if not allocation:
         return False
-    total = sum(allocation.values())
-    return abs(total - 1.0) < 1e-6
+    return abs(fsum(allocation.values()) - 1.0) < 1e-6
 
+@lru_cache(maxsize=64)
 def get_etf_symbol(symbol: str) -> Optional[str]:
     """get ETF full name from symbol"""
     return SUPPORTED_ETFS.get(symbol.upper())
\ No newline at end of file
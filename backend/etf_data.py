@@ -3,35 +3,65 @@ ETF data management module
 handles fetching, caching, and cleaning of price data from yfinance
 """
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import yfinance as yf
 import os
+import re
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
+from functools import lru_cache
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
+from cache import FileCache
 from config import (
     DATA_DIR,
+    CACHE_DIR,
     ETF_PRICES_FILE,
     YAHOO_FINANCE_CACHE_DAYS,
+    YAHOO_FINANCE_BATCH_SIZE,
+    YAHOO_FINANCE_MAX_WORKERS,
     SUPPORTED_ETFS,
+    SUPPORTED_ETFS_SET,
+    TRADING_DAYS_PER_YEAR,
 )
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_REQUIRED_COLS = frozenset({'Open', 'High', 'Low', 'Close', 'Volume'})
+
+# matches cached close columns, capturing the symbol
+_CLOSE_COL_RE = re.compile(r'^([A-Z]+)_Close$')
+
+# name of the date index column in the parquet cache
+_DATE_COL = 'Date'
+
+# parquet key-value metadata holding the date range the cache was requested for
+_START_DATE_KEY = b'requested_start_date'
+_END_DATE_KEY = b'requested_end_date'
+
+@lru_cache(maxsize=1024)
+def _ts(d: date) -> pd.Timestamp:
+    """memoized date to timestamp conversion"""
+    return pd.Timestamp(d)
+
 class ETFDataManager:
     """manages etf price data fetching, caching, and cleaning"""
     def __init__(self, data_dir: str = DATA_DIR):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         self.cache_file = self.data_dir / ETF_PRICES_FILE
+        self.symbol_cache = FileCache(self.data_dir / CACHE_DIR)
 
     def get_etf_data(self, symbols: List[str], start_date: date, end_date: date) -> pd.DataFrame:
         """get etf price data from yfinance"""
         # validate symbols
-        valid_symbols = [s for s in symbols if s.upper() in SUPPORTED_ETFS]
+        valid_symbols = [s for s in map(str.upper, symbols) if s in SUPPORTED_ETFS_SET]
         if not valid_symbols:
             raise ValueError("No valid ETF symbols provided")
         
@@ -40,12 +70,43 @@ class ETFDataManager:
             logger.info("Using cached ETF Data")
             return self._load_cached_data(valid_symbols, start_date, end_date)
         
-        # download fresh price data
-        logger.info(f"Downloading fresh ETF data for {valid_symbols}")
-        data = self._download_etf_data(valid_symbols, start_date, end_date)
+        # reuse per-symbol cache entries and only download the missing symbols
+        all_data = {}
+        missing_symbols = []
+        for symbol in valid_symbols:
+            cached = self.symbol_cache.get(symbol, start_date, end_date)
+            if cached is None:
+                missing_symbols.append(symbol)
+            else:
+                all_data[symbol] = cached
+
+        if missing_symbols:
+            logger.info(f"Downloading fresh ETF data for {missing_symbols}")
+            try:
+                downloaded = self._download_etf_data(missing_symbols, start_date, end_date)
+            except ValueError as e:
+                # drop the symbols that failed like a partial download would,
+                # keeping the cached ones
+                logger.error(f"Error downloading {missing_symbols}: {e}")
+                downloaded = pd.DataFrame()
+
+            for symbol in missing_symbols:
+                symbol_cols = [col for col in downloaded.columns if col.startswith(f"{symbol}_")]
+                if not symbol_cols:
+                    continue
+
+                # drop the rows before this symbol's first quote
+                symbol_data = downloaded[symbol_cols].dropna()
+                self.symbol_cache.set(symbol, start_date, end_date, symbol_data)
+                all_data[symbol] = symbol_data
+
+        if not all_data:
+            raise ValueError("No ETF data could be downloaded")
+
+        data = self._combine_etf_data({s: all_data[s] for s in valid_symbols if s in all_data})
         
         # save to cache
-        self._cache_data(data)
+        self._cache_data(data, start_date, end_date)
         
         return data
     
@@ -59,108 +120,230 @@ class ETFDataManager:
         if cache_age.days > YAHOO_FINANCE_CACHE_DAYS:
             return False
         
-        # check if cached data covers our date range
+        # check if cached data covers our date range, reading only the file metadata
         try:
-            cached_data = pd.read_csv(self.cache_file, index_col=0, parse_dates=True)
-            cached_symbols = [col.split('_')[0] for col in cached_data.columns if '_close' in col]
-            
-            if not all(symbol in cached_symbols for symbol in symbols):
+            parquet_file = pq.ParquetFile(self.cache_file, memory_map=True)
+
+            # older caches stored the index under another name, so the date filter can't read them
+            if _DATE_COL not in parquet_file.schema_arrow.names:
+                return False
+
+            cached_symbols = {m.group(1) for m in map(_CLOSE_COL_RE.match, parquet_file.schema_arrow.names) if m}
+
+            # the cache is trimmed to the dates every cached symbol shares, so a
+            # subset of its symbols may have history the cache left out
+            if cached_symbols != set(symbols):
                 return False
             
-            if cached_data.index.min() > pd.Timestamp(start_date) or cached_data.index.max() < pd.Timestamp(end_date):
+            request_range = self._cached_request_range(parquet_file)
+            if request_range is None:
                 return False
-                
+
+            cached_start, cached_end = request_range
+            if cached_start > _ts(start_date) or cached_end < _ts(end_date):
+                return False
+
             return True
         except Exception as e:
             logger.warning(f"Error reading cache: {e}")
             return False
-        
-    def _download_etf_data(self, symbols: List[str], start_date: date, end_date: date) -> pd.DataFrame:
-        """download etf price data from yfinance"""
-        all_data = {}
 
-        for symbol in symbols:
-            try:
-                logger.info(f"Downloading data for {symbol}")
-                ticker = yf.Ticker(symbol)
-                data = ticker.history(start=start_date, end=end_date)
+    def _cached_request_range(self, parquet_file: pq.ParquetFile) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """get the date range the cache was requested for from the file metadata
 
-                if data.empty:
-                    logger.warning(f"No data found for {symbol}")
-                    continue
+        the cached dates themselves can't be compared against a request, since
+        the data ends before an exclusive end date and may start after a
+        weekend or holiday start date
+        """
+        metadata = parquet_file.schema_arrow.metadata or {}
+        if _START_DATE_KEY not in metadata or _END_DATE_KEY not in metadata:
+            return None
 
-                # clean the data
-                data = self._clean_data(data, symbol)
-                all_data[symbol] = data
+        return pd.Timestamp(metadata[_START_DATE_KEY].decode()), pd.Timestamp(metadata[_END_DATE_KEY].decode())
 
+    def _download_etf_data(self, symbols: List[str], start_date: date, end_date: date) -> pd.DataFrame:
+        """download etf price data from yfinance in batched requests
+
+        rows before a symbol's first quote are left as NaN so each symbol
+        keeps its own full history
+        """
+        frames = []
+
+        # one request per batch instead of one per symbol
+        for i in range(0, len(symbols), YAHOO_FINANCE_BATCH_SIZE):
+            batch = symbols[i:i + YAHOO_FINANCE_BATCH_SIZE]
+            try:
+                logger.info(f"Downloading data for {batch}")
+                data = yf.download(
+                    batch,
+                    start=start_date,
+                    end=end_date,
+                    group_by='ticker',
+                    auto_adjust=True,
+                    threads=True,
+                    progress=False,
+                )
             except Exception as e:
-                logger.error(f"Error downloading {symbol}: {e}")
+                logger.error(f"Error downloading {batch}, falling back to per-symbol downloads: {e}")
+                data = self._download_symbols_parallel(batch, start_date, end_date)
+                if data is not None:
+                    frames.append(data)
                 continue
 
-        if not all_data:
+            if data.empty:
+                logger.warning(f"No data found for {batch}")
+                continue
+
+            # older yfinance versions return flat columns for a single ticker
+            if not isinstance(data.columns, pd.MultiIndex):
+                data.columns = pd.MultiIndex.from_product([batch, data.columns])
+
+            data.columns = [f"{sym}_{col}" for sym, col in data.columns]
+            frames.append(data)
+
+        if not frames:
             raise ValueError("No ETF data could be downloaded")
-        
-        # combine all ETF data into single dataframe
-        combined_data = self._combine_etf_data(all_data)
-        return combined_data
+
+        combined = pd.concat(frames, axis=1)
+
+        # symbols yahoo could not serve come back as all-NaN columns
+        combined = combined.dropna(axis=1, how='all')
+
+        for symbol in symbols:
+            symbol_cols = [f"{symbol}_{col}" for col in _REQUIRED_COLS]
+            missing_cols = [col for col in symbol_cols if col not in combined.columns]
+
+            if len(missing_cols) == len(symbol_cols):
+                logger.warning(f"No data found for {symbol}")
+            elif missing_cols:
+                logger.error(f"Missing required columns for {symbol}: {missing_cols}")
+                combined = combined.drop(columns=[col for col in combined.columns if col.startswith(f"{symbol}_")])
+
+        if combined.empty:
+            raise ValueError("No ETF data could be downloaded")
+
+        # forward fill the combined data once instead of per symbol
+        combined = combined.ffill()
+
+        return combined
     
-    def _clean_etf_data(self, data: pd.DataFrame, symbol: str) -> pd.DataFrame:
-        """clean and prepare ETF data"""
-        # forward fill missing values
-        data = data.fillna(method='ffill')
+    def _download_symbols_parallel(self, symbols: List[str], start_date: date, end_date: date) -> Optional[pd.DataFrame]:
+        """download etf price data one symbol at a time on a thread pool"""
+        max_workers = min(len(symbols), YAHOO_FINANCE_MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda symbol: self._download_symbol_data(symbol, start_date, end_date), symbols)
+            all_data = [data for data in results if data is not None]
+
+        if not all_data:
+            return None
+
+        return pd.concat(all_data, axis=1)
+
+    def _download_symbol_data(self, symbol: str, start_date: date, end_date: date) -> Optional[pd.DataFrame]:
+        """download and clean price data for a single etf"""
+        try:
+            logger.info(f"Downloading data for {symbol}")
+            ticker = yf.Ticker(symbol)
+            data = ticker.history(start=start_date, end=end_date, actions=False)
+
+            if data.empty:
+                logger.warning(f"No data found for {symbol}")
+                return None
+
+            # match the tz-naive daily index returned by yf.download
+            if data.index.tz is not None:
+                data.index = data.index.tz_localize(None)
+
+            return self._clean_etf_data(data, symbol)
 
-        # remove any remaining NaN values
-        data = data.dropna()
+        except Exception as e:
+            logger.error(f"Error downloading {symbol}: {e}")
+            return None
 
-        required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
-        missing_cols = [col for col in required_cols if col not in data.columns]
+    def _clean_etf_data(self, data: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        """clean and prepare ETF data"""
+        missing_cols = _REQUIRED_COLS.difference(data.columns)
 
         if missing_cols:
-            raise ValueError(f"Missing required columns for {symbol}: {missing_cols}")
+            raise ValueError(f"Missing required columns for {symbol}: {sorted(missing_cols)}")
 
-        data.columns = [f"{symbol}_{col}" for col in data.columns]
+        # forward fill missing values
+        data.ffill(inplace=True)
 
-        return data
+        # after the forward fill only leading rows can still be NaN
+        first_valid = data['Close'].first_valid_index()
+        if first_valid is None:
+            raise ValueError(f"No price data for {symbol}")
+        data = data.loc[first_valid:]
+
+        return data.rename(columns=lambda col: f"{symbol}_{col}")
     
     def _combine_etf_data(self, all_data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         """combine etf data from different symbols into single dataframe"""
-        start_dates = [df.index.min() for df in all_data.values()]
-        end_dates = [df.index.max() for df in all_data.values()]
-
-        common_start = max(start_dates)
-        common_end = min(end_dates)
+        # bounds on whole days, so intraday first and last bars survive the daily resample
+        common_start = max(df.index.min() for df in all_data.values()).normalize()
+        common_end = min(df.index.max() for df in all_data.values()).normalize()
 
-        combined = pd.DataFrame(index=pd.date_range(common_start, common_end, freq='D'))
+        # one aligned join instead of assigning each column separately
+        combined = pd.concat(list(all_data.values()), axis=1, join='outer')
 
-        for symbol, data in all_data.items():
-           daily_data = data.resample('D').last()
+        # collapse intraday bars to daily in one pass over the joined frame,
+        # dropping the empty weekend and holiday rows the resample adds
+        if not combined.index.is_normalized:
+            combined = combined.resample('D').last().dropna(how='all')
 
-           for col in data.columns:
-               combined[col] = daily_data[col]
+        combined = combined.loc[common_start:common_end].ffill().dropna()
 
-        combined = combined.dropna()
+        # float32 prices halve memory traffic and cache size
+        combined = combined.astype({
+            col: np.uint32 if col.endswith('_Volume') else np.float32
+            for col in combined.columns
+            if col.endswith(('_Open', '_High', '_Low', '_Close', '_Volume'))
+        })
 
         return combined
     
-    def _cache_data(self, data: pd.DataFrame) -> None:
-        """cache etf data to file"""
+    def _cache_data(self, data: pd.DataFrame, start_date: date, end_date: date) -> None:
+        """cache etf data to file along with the date range it was requested for"""
         try:
-            data.to_csv(self.cache_file)
+            table = pa.Table.from_pandas(data.rename_axis(_DATE_COL))
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                _START_DATE_KEY: _ts(start_date).isoformat().encode(),
+                _END_DATE_KEY: _ts(end_date).isoformat().encode(),
+            })
+
+            # one trading year per row group keeps the date statistics tight
+            # enough for range reads to skip whole row groups
+            pq.write_table(
+                table,
+                self.cache_file,
+                compression='zstd',
+                row_group_size=TRADING_DAYS_PER_YEAR,
+            )
             logger.info(f"ETF data cached to {self.cache_file}")
         except Exception as e:
             logger.error(f"Error caching ETF data: {e}")
 
     def _load_cached_data(self, symbols: List[str], start_date: date, end_date: date) -> pd.DataFrame:
         """load and filter cached etf data"""
-        data = pd.read_csv(self.cache_file, index_col=0, parse_dates=True)
+        # one memory map serves both the footer and the column reads
+        with pa.memory_map(str(self.cache_file), 'r') as source:
+            parquet_file = pq.ParquetFile(source)
+            cached_cols = parquet_file.schema_arrow.names
 
-        data = data[(data.index >= pd.Timestamp(start_date)) & (data.index <= pd.Timestamp(end_date))]
+            symbol_cols = []
+            for symbol in symbols:
+                symbol_cols.extend([col for col in cached_cols if col.startswith(f"{symbol}_")])
 
-        symbol_cols = []
-        for symbol in symbols:
-            symbol_cols.extend([col for col in data.columns if col.startswith(f"{symbol}_")])
-
-        data = data[symbol_cols]
+            # only the requested symbol columns and date range are materialized
+            table = pq.read_table(
+                source,
+                columns=symbol_cols,
+                filters=[(_DATE_COL, '>=', _ts(start_date)), (_DATE_COL, '<=', _ts(end_date))],
+                use_pandas_metadata=True,
+            )
+            data = table.to_pandas()
 
         return data
     
@@ -185,6 +368,17 @@ class ETFDataManager:
         except Exception as e:
             logger.error(f"Error getting info for {symbol}: {e}")
             return None
+
+    def get_etf_info_batch(self, symbols: List[str]) -> Dict[str, Optional[Dict]]:
+        """get basic information about several etfs concurrently"""
+        if not symbols:
+            return {}
+
+        max_workers = min(len(symbols), YAHOO_FINANCE_MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(symbols, executor.map(self.get_etf_info, symbols)))
+
+        return results
         
 def get_etf_price(symbols: List[str], start_date: date, end_date: date) -> pd.DataFrame:
     manager = ETFDataManager()
@@ -3,19 +3,162 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 from datetime import date
 import logging
+from numba import njit, types
 
 from config import RISK_FREE_RATE, TRADING_DAYS_PER_YEAR
 logger = logging.getLogger(__name__)
 
+# fastmath without the no-nan/no-inf assumptions, since the kernel writes NaN
+# for metrics that are undefined on short series
+_FASTMATH_FLAGS = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+# number of statistics written by the fused metrics kernel
+_METRICS_OUT_SIZE = 12
+
+# rolling window of the fused metrics kernel, passed in rather than read as a
+# global so the on-disk kernel cache can't hold on to a stale value
+_ROLLING_WINDOW = TRADING_DAYS_PER_YEAR
+
+# the kernel only reads its inputs, so it also takes the read-only arrays
+# pandas hands out under copy-on-write
+_READONLY_FLOAT32 = types.Array(types.float32, 1, 'C', readonly=True)
+
+@njit(
+    types.void(_READONLY_FLOAT32, _READONLY_FLOAT32, types.float64, types.int64, types.float64[::1]),
+    cache=True,
+    fastmath=_FASTMATH_FLAGS,
+)
+def _fused_metrics_kernel(values, returns, rf_daily, window, out):
+    """compute every per-day metric statistic in a single pass over values and returns
+
+    writes (mean_return, return_variance, best_year, worst_year, max_drawdown,
+    current_drawdown, mdd_start_idx, mdd_end_idx, rolling_sharpe_mean,
+    rolling_sharpe_min, rolling_sharpe_max, current_rolling_sharpe) to out,
+    with the sharpe figures daily (non-annualized)
+    """
+    n = values.shape[0]
+
+    # welford mean/variance of daily returns
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+
+    # welford mean/variance of excess returns over the trailing window
+    w_mean = 0.0
+    w_m2 = 0.0
+    sharpe_count = 0
+    sharpe_total = 0.0
+    sharpe_min = 0.0
+    sharpe_max = 0.0
+    sharpe_last = np.nan
+
+    # best and worst rolling 1 year return
+    year_count = 0
+    best_year = np.nan
+    worst_year = np.nan
+
+    # running peak for drawdowns
+    peak = values[0]
+    peak_idx = 0
+    max_drawdown = 0.0
+    drawdown = 0.0
+    mdd_start_idx = 0
+    mdd_end_idx = 0
+
+    for t in range(n):
+        value = values[t]
+
+        if value > peak:
+            peak = value
+            peak_idx = t
+
+        drawdown = value / peak - 1.0
+        if drawdown < max_drawdown:
+            max_drawdown = drawdown
+            mdd_start_idx = peak_idx
+            mdd_end_idx = t
+
+        if t >= window:
+            year_return = value / values[t - window] - 1.0
+            if year_count == 0 or year_return > best_year:
+                best_year = year_return
+            if year_count == 0 or year_return < worst_year:
+                worst_year = year_return
+            year_count += 1
+
+        if t == 0:
+            continue
+
+        # returns[k] is the return from day k to day k + 1
+        k = t - 1
+        x = returns[k]
+
+        count += 1
+        delta = x - mean
+        mean += delta / count
+        m2 += delta * (x - mean)
+
+        excess = x - rf_daily
+        if k < window:
+            # window still filling up
+            delta = excess - w_mean
+            w_mean += delta / (k + 1)
+            w_m2 += delta * (excess - w_mean)
+        else:
+            # slide the window: replace the oldest excess return with the newest
+            dropped = returns[k - window] - rf_daily
+            new_mean = w_mean + (excess - dropped) / window
+            w_m2 += (excess - dropped) * (excess - new_mean + dropped - w_mean)
+            w_mean = new_mean
+
+        if k >= window - 1:
+            w_var = w_m2 / (window - 1)
+            if w_var > 0.0:
+                sharpe_last = w_mean / np.sqrt(w_var)
+                if sharpe_count == 0 or sharpe_last < sharpe_min:
+                    sharpe_min = sharpe_last
+                if sharpe_count == 0 or sharpe_last > sharpe_max:
+                    sharpe_max = sharpe_last
+                sharpe_total += sharpe_last
+                sharpe_count += 1
+            else:
+                sharpe_last = np.nan
+
+    variance = m2 / (count - 1) if count > 1 else np.nan
+
+    if sharpe_count > 0:
+        sharpe_mean = sharpe_total / sharpe_count
+    else:
+        sharpe_mean = np.nan
+        sharpe_min = np.nan
+        sharpe_max = np.nan
+
+    out[0] = mean
+    out[1] = variance
+    out[2] = best_year
+    out[3] = worst_year
+    out[4] = max_drawdown
+    out[5] = drawdown
+    out[6] = mdd_start_idx
+    out[7] = mdd_end_idx
+    out[8] = sharpe_mean
+    out[9] = sharpe_min
+    out[10] = sharpe_max
+    out[11] = sharpe_last
+
 class PortfolioMetrics:
     """calculate portfolio performance metrics"""
     def __init__(self, portfolio_values: pd.Series, benchmark_values: Optional[pd.Series] = None) -> None:
         self.portfolio_values = portfolio_values
         self.benchmark_values = benchmark_values
-        self.returns = self._calculate_returns(portfolio_values)
+
+        # metrics run on the raw float32 arrays to skip pandas per-call overhead;
+        # to_numpy returns a strided view of a float32 series, which the kernel rejects
+        self._values = np.ascontiguousarray(portfolio_values.to_numpy(dtype=np.float32))
+        self._returns = self._calculate_returns(self._values)
 
         if benchmark_values is not None:
-            self.benchmark_returns = self._calculate_returns(benchmark_values)
+            self.benchmark_returns = self._calculate_returns(np.ascontiguousarray(benchmark_values.to_numpy(dtype=np.float32)))
         else:
             self.benchmark_returns = None
 
@@ -23,44 +166,96 @@ class PortfolioMetrics:
         """calculate all performance metrics"""
         metrics = {}
 
-        metrics.update(self._calculate_return_metrics())
-        metrics.update(self._calculate_risk_metrics())
-        metrics.update(self._calculate_drawdown_metrics())
-        metrics.update(self._calculate_rolling_metrics())
+        metrics.update(self._calculate_core_metrics())
 
         if self.benchmark_returns is not None:
             metrics.update(self._calculate_benchmark_metrics())
         return metrics
 
-    def _calculate_returns(self, values: pd.Series) -> pd.Series:
+    def _calculate_returns(self, values: np.ndarray) -> np.ndarray:
         """calculate daily returns"""
-        return values.pct_change().dropna()
-
-    def _calculate_return_metrics(self) -> Dict:
-        total_return = (self.portfolio_values.iloc[-1] / self.portfolio_values.iloc[0] - 1)
-        years = len(self.portfolio_values) / TRADING_DAYS_PER_YEAR
-        # compound annual growth rate
-        cagr = (self.portfolio_values.iloc[-1] / self.portfolio_values.iloc[0]) ** (1/years) - 1
-        # annualized return 
-        annualized_return = self.returns.mean() * TRADING_DAYS_PER_YEAR
-        # best and worst periods
-        rolling_1y = self.portfolio_values.pct_change(periods=TRADING_DAYS_PER_YEAR).dropna()
-        best_year = rolling_1y.max()
-        worst_year = rolling_1y.min()
+        return np.diff(values) / values[:-1]
+
+    def _calculate_core_metrics(self) -> Dict:
+        """calculate return, risk, drawdown and rolling metrics in one fused pass"""
+        values = self._values
+        if len(values) < 2:
+            raise ValueError("At least two portfolio values are required to calculate metrics")
+
+        rf_daily = RISK_FREE_RATE / TRADING_DAYS_PER_YEAR
+        out = np.empty(_METRICS_OUT_SIZE)
+        _fused_metrics_kernel(values, self._returns, rf_daily, _ROLLING_WINDOW, out)
+        (
+            mean_return,
+            return_variance,
+            best_year,
+            worst_year,
+            max_drawdown,
+            current_drawdown,
+            start_idx,
+            end_idx,
+            rolling_sharpe_mean,
+            rolling_sharpe_min,
+            rolling_sharpe_max,
+            current_rolling_sharpe,
+        ) = out
+
+        # promote the endpoints, not the array, for the exponentiation
+        growth = float(values[-1]) / float(values[0])
+        years = len(values) / TRADING_DAYS_PER_YEAR
+        annualization = np.sqrt(TRADING_DAYS_PER_YEAR)
+        return_std = np.sqrt(return_variance)
+        start_idx, end_idx = int(start_idx), int(end_idx)
+        index = self.portfolio_values.index
 
         return {
-            'total_return': total_return,
-            'cagr': cagr,
-            'annualized_return': annualized_return,
+            'total_return': growth - 1,
+            # compound annual growth rate
+            'cagr': growth ** (1/years) - 1,
+            'annualized_return': mean_return * TRADING_DAYS_PER_YEAR,
             'best_year': best_year,
             'worst_year': worst_year,
-            'total_days': len(self.portfolio_values),
+            'total_days': len(values),
             'years': years,
+            'volatility': return_std * annualization,
+            'sharpe_ratio': (mean_return - rf_daily) / return_std * annualization,
+            'max_drawdown': max_drawdown,
+            'current_drawdown': current_drawdown,
+            'max_drawdown_start': index[start_idx],
+            'max_drawdown_end': index[end_idx],
+            # in trading days
+            'max_drawdown_duration': end_idx - start_idx,
+            # 1 year rolling sharpe ratio
+            'rolling_sharpe_mean': rolling_sharpe_mean * annualization,
+            'rolling_sharpe_min': rolling_sharpe_min * annualization,
+            'rolling_sharpe_max': rolling_sharpe_max * annualization,
+            'current_rolling_sharpe': current_rolling_sharpe * annualization,
         }
 
-    def _calculate_risk_metrics(self) -> Dict:
-        # standard deviation
-        volatility = self.returns.std() * np.sqrt(TRADING_DAYS_PER_YEAR)
-        # sharpe ratio
-        excess_returns = self.returns - (RISK_FREE_RATE / TRADING_DAYS_PER_YEAR)
-        sharpe_ratio = excess_returns
+    def _calculate_benchmark_metrics(self) -> Dict:
+        returns = self._returns.astype(np.float64)
+        benchmark_returns = self.benchmark_returns.astype(np.float64)
+        if len(returns) != len(benchmark_returns):
+            raise ValueError("Portfolio and benchmark values must cover the same days")
+
+        rf_daily = RISK_FREE_RATE / TRADING_DAYS_PER_YEAR
+        benchmark_values = self.benchmark_values.to_numpy(dtype=np.float64)
+
+        # beta and annualized jensen's alpha against the benchmark
+        covariance = np.cov(returns, benchmark_returns, ddof=1)
+        beta = covariance[0, 1] / covariance[1, 1]
+        alpha = (returns.mean() - rf_daily - beta * (benchmark_returns.mean() - rf_daily)) * TRADING_DAYS_PER_YEAR
+        correlation = covariance[0, 1] / np.sqrt(covariance[0, 0] * covariance[1, 1])
+        # active return vs the benchmark
+        active_returns = returns - benchmark_returns
+        tracking_error = active_returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)
+        information_ratio = active_returns.mean() * TRADING_DAYS_PER_YEAR / tracking_error
+
+        return {
+            'benchmark_total_return': benchmark_values[-1] / benchmark_values[0] - 1,
+            'beta': beta,
+            'alpha': alpha,
+            'correlation': correlation,
+            'tracking_error': tracking_error,
+            'information_ratio': information_ratio,
+        }
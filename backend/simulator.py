@@ -0,0 +1,134 @@
+"""
+portfolio simulation module
+runs a buy-and-hold backtest with periodic contributions and rebalancing
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Union
+import logging
+from numba import njit
+
+from config import (
+    DEFAULT_INTIAL_INVESTMENT,
+    DEFAULT_MONTHLY_CONTRIBUTION,
+    DEFAULT_CONTRIBUTION_FREQUENCY,
+    DEFAULT_REBALANCE_FREQUENCY,
+    ContributionFrequency,
+    RebalanceFrequency,
+    validate_allocation,
+)
+
+logger = logging.getLogger(__name__)
+
+Frequency = Union[ContributionFrequency, RebalanceFrequency]
+
+# numpy datetime unit each frequency is bucketed by
+_PERIOD_UNITS = {
+    "monthly": "datetime64[M]",
+    "quarterly": "datetime64[M]",
+    "yearly": "datetime64[Y]",
+}
+
+@njit(cache=True)
+def run_backtest(prices: np.ndarray, weights: np.ndarray, contrib_amt: float,
+                 contrib_mask: np.ndarray, rebal_mask: np.ndarray, initial: float) -> np.ndarray:
+    """walk the [days, assets] close price matrix once and return the daily portfolio value"""
+    n_days, n_assets = prices.shape
+    values = np.empty(n_days)
+    shares = np.empty(n_assets)
+
+    # initial purchase at the first close
+    for i in range(n_assets):
+        shares[i] = initial * weights[i] / prices[0, i]
+
+    for t in range(n_days):
+        if t > 0:
+            if contrib_mask[t]:
+                for i in range(n_assets):
+                    shares[i] += contrib_amt * weights[i] / prices[t, i]
+
+            if rebal_mask[t]:
+                total = 0.0
+                for i in range(n_assets):
+                    total += shares[i] * prices[t, i]
+                for i in range(n_assets):
+                    shares[i] = total * weights[i] / prices[t, i]
+
+        value = 0.0
+        for i in range(n_assets):
+            value += shares[i] * prices[t, i]
+        values[t] = value
+
+    return values
+
+def _frequency_mask(index: pd.DatetimeIndex, frequency: Frequency) -> np.ndarray:
+    """mark the first trading day of each new period"""
+    mask = np.zeros(len(index), dtype=np.bool_)
+    if frequency.value not in _PERIOD_UNITS or not len(index):
+        return mask
+
+    # bucket the whole index at once instead of reading date fields per day
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    days = index.to_numpy(dtype='datetime64[D]')
+    periods = days.astype(_PERIOD_UNITS[frequency.value]).astype(np.int64)
+    if frequency.value == "quarterly":
+        periods //= 3
+
+    mask[0] = True
+    mask[1:] = periods[1:] != periods[:-1]
+
+    return mask
+
+class PortfolioSimulator:
+    """simulates a portfolio over etf price data"""
+    def __init__(
+        self,
+        price_data: pd.DataFrame,
+        allocation: Dict[str, float],
+        initial_investment: float = DEFAULT_INTIAL_INVESTMENT,
+        contribution_amount: float = DEFAULT_MONTHLY_CONTRIBUTION,
+        contribution_frequency: ContributionFrequency = DEFAULT_CONTRIBUTION_FREQUENCY,
+        rebalance_frequency: RebalanceFrequency = DEFAULT_REBALANCE_FREQUENCY,
+    ) -> None:
+        if not validate_allocation(allocation):
+            raise ValueError("Allocation must sum to 100%")
+
+        self.price_data = price_data
+        self.allocation = {symbol.upper(): weight for symbol, weight in allocation.items()}
+        self.initial_investment = initial_investment
+        self.contribution_amount = contribution_amount
+        self.contribution_frequency = contribution_frequency
+        self.rebalance_frequency = rebalance_frequency
+
+    def run(self) -> pd.Series:
+        """run the backtest and return daily portfolio values"""
+        symbols = list(self.allocation)
+        close_cols = [f"{symbol}_Close" for symbol in symbols]
+
+        missing_cols = [col for col in close_cols if col not in self.price_data.columns]
+        if missing_cols:
+            raise ValueError(f"Missing price data for: {missing_cols}")
+
+        if self.price_data.empty:
+            raise ValueError("No price data to simulate")
+
+        # one contiguous [days, assets] block instead of per-row dataframe lookups
+        prices = np.ascontiguousarray(self.price_data[close_cols].to_numpy(dtype=np.float32))
+        weights = np.array([self.allocation[symbol] for symbol in symbols], dtype=np.float64)
+
+        index = self.price_data.index
+        contrib_mask = _frequency_mask(index, self.contribution_frequency)
+        rebal_mask = _frequency_mask(index, self.rebalance_frequency)
+
+        values = run_backtest(
+            prices,
+            weights,
+            float(self.contribution_amount),
+            contrib_mask,
+            rebal_mask,
+            float(self.initial_investment),
+        )
+
+        return pd.Series(values, index=index, name='portfolio_value')
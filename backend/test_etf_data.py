@@ -0,0 +1,164 @@
+import json
+import os
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from cache import FileCache
+from etf_data import ETFDataManager
+
+START_DATE = date(2000, 1, 1)
+END_DATE = date(2025, 6, 30)
+
+
+def _ohlcv(symbol: str, start: str, end: str = '2025-06-27', seed: int = 0) -> pd.DataFrame:
+    """synthetic downloaded price frame for one symbol"""
+    index = pd.bdate_range(start, end, name='Date')
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0.0003, 0.01, len(index)))
+    return pd.DataFrame({
+        f"{symbol}_Open": close,
+        f"{symbol}_High": close * 1.01,
+        f"{symbol}_Low": close * 0.99,
+        f"{symbol}_Close": close,
+        f"{symbol}_Volume": rng.integers(1_000, 1_000_000, len(index)).astype(np.float64),
+    }, index=index)
+
+
+@pytest.fixture
+def manager(tmp_path) -> ETFDataManager:
+    return ETFDataManager(data_dir=str(tmp_path))
+
+
+@pytest.fixture
+def histories() -> dict:
+    # VXUS starts later than SPY, so their common range starts in 2011
+    return {'SPY': _ohlcv('SPY', '2000-01-03'), 'VXUS': _ohlcv('VXUS', '2011-01-28', seed=1)}
+
+
+@pytest.fixture
+def fake_download(monkeypatch, manager, histories) -> list:
+    """serve downloads from the synthetic histories and record what was requested"""
+    requested = []
+
+    def download(symbols, start_date, end_date):
+        requested.append(list(symbols))
+        return pd.concat([histories[symbol] for symbol in symbols], axis=1)
+
+    monkeypatch.setattr(manager, '_download_etf_data', download)
+    return requested
+
+
+def test_file_cache_round_trip_and_ttl_expiry(tmp_path):
+    cache = FileCache(tmp_path, ttl_days=1)
+    data = _ohlcv('SPY', '2020-01-01', '2020-12-31')
+
+    assert cache.get('SPY', START_DATE, END_DATE) is None
+
+    cache.set('SPY', START_DATE, END_DATE, data)
+    pd.testing.assert_frame_equal(cache.get('SPY', START_DATE, END_DATE), data, check_freq=False)
+    assert cache.get('SPY', START_DATE, date(2024, 12, 31)) is None
+
+    # age the entry past its time-to-live
+    meta_path = next(tmp_path.glob('SPY_*.json'))
+    meta = json.loads(meta_path.read_text())
+    meta['timestamp'] = time.time() - 2 * 24 * 60 * 60
+    meta_path.write_text(json.dumps(meta))
+
+    assert cache.get('SPY', START_DATE, END_DATE) is None
+
+
+def test_combine_casts_and_trims_to_common_range(manager, histories):
+    combined = manager._combine_etf_data(histories)
+
+    assert combined.index[0] == histories['VXUS'].index[0]
+    assert combined.index[-1] == histories['SPY'].index[-1]
+    assert not combined.isna().any().any()
+    assert (combined.dtypes[combined.columns.str.endswith('_Volume')] == np.uint32).all()
+    assert (combined.dtypes[~combined.columns.str.endswith('_Volume')] == np.float32).all()
+
+
+def test_combine_resamples_intraday_bars_to_trading_days(manager):
+    data = _ohlcv('SPY', '2024-01-01', '2024-03-29')
+    data.index = data.index + pd.Timedelta(hours=16)
+
+    combined = manager._combine_etf_data({'SPY': data})
+
+    assert combined.index.is_normalized
+    assert (combined.index.dayofweek < 5).all()
+    assert len(combined) == len(data)
+
+
+def test_parquet_cache_round_trip_with_date_pushdown(manager, histories):
+    data = manager._combine_etf_data(histories)
+    manager._cache_data(data, START_DATE, END_DATE)
+
+    loaded = manager._load_cached_data(['SPY'], date(2015, 1, 1), date(2015, 12, 31))
+
+    expected = data.loc['2015-01-01':'2015-12-31', [col for col in data.columns if col.startswith('SPY_')]]
+    pd.testing.assert_frame_equal(loaded, expected, check_freq=False, check_names=False)
+
+
+def test_cache_is_fresh_only_for_cached_symbols_and_range(manager, histories):
+    manager._cache_data(manager._combine_etf_data(histories), START_DATE, END_DATE)
+
+    assert manager._is_cache_fresh(['SPY', 'VXUS'], START_DATE, END_DATE)
+    assert manager._is_cache_fresh(['SPY', 'VXUS'], date(2015, 1, 1), date(2020, 1, 1))
+    assert not manager._is_cache_fresh(['SPY', 'VXUS'], START_DATE, date(2025, 12, 31))
+    assert not manager._is_cache_fresh(['SPY'], START_DATE, END_DATE)
+    assert not manager._is_cache_fresh(['SPY', 'VXUS', 'BND'], START_DATE, END_DATE)
+
+
+def test_cache_without_request_metadata_or_date_column_is_stale(manager, histories):
+    data = manager._combine_etf_data(histories)
+
+    # a cache written without the requested range
+    data.rename_axis('Date').to_parquet(manager.cache_file)
+    assert not manager._is_cache_fresh(['SPY', 'VXUS'], START_DATE, END_DATE)
+
+    # an older cache that stored the index under pandas' default name
+    table = pa.Table.from_pandas(data.rename_axis(None))
+    pq.write_table(table.replace_schema_metadata({
+        **table.schema.metadata,
+        b'requested_start_date': b'2000-01-01T00:00:00',
+        b'requested_end_date': b'2025-06-30T00:00:00',
+    }), manager.cache_file)
+    assert not manager._is_cache_fresh(['SPY', 'VXUS'], START_DATE, END_DATE)
+
+
+def test_expired_cache_is_stale(manager, histories):
+    manager._cache_data(manager._combine_etf_data(histories), START_DATE, END_DATE)
+
+    old = time.time() - 30 * 24 * 60 * 60
+    os.utime(manager.cache_file, (old, old))
+
+    assert not manager._is_cache_fresh(['SPY', 'VXUS'], START_DATE, END_DATE)
+
+
+def test_subset_request_keeps_full_symbol_history(manager, histories, fake_download):
+    combined = manager.get_etf_data(['SPY', 'VXUS'], START_DATE, END_DATE)
+    spy = manager.get_etf_data(['SPY'], START_DATE, END_DATE)
+
+    assert combined.index[0] == histories['VXUS'].index[0]
+    assert spy.index[0] == histories['SPY'].index[0]
+    # the second request is served from the per-symbol cache
+    assert fake_download == [['SPY', 'VXUS']]
+
+
+def test_cached_symbols_survive_failed_download(manager, histories, monkeypatch):
+    manager.symbol_cache.set('SPY', START_DATE, END_DATE, histories['SPY'])
+
+    def download(symbols, start_date, end_date):
+        raise ValueError("No ETF data could be downloaded")
+
+    monkeypatch.setattr(manager, '_download_etf_data', download)
+
+    data = manager.get_etf_data(['SPY', 'VXUS'], START_DATE, END_DATE)
+
+    assert list(data.columns) == list(histories['SPY'].columns)
+    assert data.index[0] == histories['SPY'].index[0]
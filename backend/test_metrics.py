@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import RISK_FREE_RATE, TRADING_DAYS_PER_YEAR
+from metrics import PortfolioMetrics
+
+RF_DAILY = RISK_FREE_RATE / TRADING_DAYS_PER_YEAR
+
+
+def _random_walk(n_days: int, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    values = 10000 * np.cumprod(1 + rng.normal(0.0004, 0.01, n_days))
+    return pd.Series(values, index=pd.bdate_range('2010-01-01', periods=n_days))
+
+
+@pytest.fixture
+def portfolio_values() -> pd.Series:
+    return _random_walk(1500)
+
+
+@pytest.fixture
+def reference_values(portfolio_values: pd.Series) -> pd.Series:
+    # the metrics run on float32 values, so the pandas reference starts from the same precision
+    return portfolio_values.astype(np.float32).astype(np.float64)
+
+
+def test_return_and_risk_metrics_match_pandas(portfolio_values, reference_values):
+    metrics = PortfolioMetrics(portfolio_values)._calculate_all_metrics()
+    returns = reference_values.pct_change().dropna()
+    rolling_1y = reference_values.pct_change(periods=TRADING_DAYS_PER_YEAR).dropna()
+
+    assert metrics['annualized_return'] == pytest.approx(returns.mean() * TRADING_DAYS_PER_YEAR, rel=1e-5)
+    assert metrics['volatility'] == pytest.approx(returns.std() * np.sqrt(TRADING_DAYS_PER_YEAR), rel=1e-5)
+    excess_returns = returns - RF_DAILY
+    sharpe_ratio = excess_returns.mean() / excess_returns.std() * np.sqrt(TRADING_DAYS_PER_YEAR)
+    assert metrics['sharpe_ratio'] == pytest.approx(sharpe_ratio, rel=1e-5)
+    assert metrics['best_year'] == pytest.approx(rolling_1y.max(), rel=1e-5)
+    assert metrics['worst_year'] == pytest.approx(rolling_1y.min(), rel=1e-5)
+
+
+def test_drawdown_metrics_match_cummax(portfolio_values, reference_values):
+    metrics = PortfolioMetrics(portfolio_values)._calculate_all_metrics()
+    drawdowns = reference_values / reference_values.cummax() - 1
+    trough = drawdowns.idxmin()
+    peak = reference_values.loc[:trough].idxmax()
+
+    assert metrics['max_drawdown'] == pytest.approx(drawdowns.min(), rel=1e-5)
+    assert metrics['current_drawdown'] == pytest.approx(drawdowns.iloc[-1], rel=1e-5, abs=1e-7)
+    assert metrics['max_drawdown_start'] == peak
+    assert metrics['max_drawdown_end'] == trough
+    assert metrics['max_drawdown_duration'] == reference_values.index.get_loc(trough) - reference_values.index.get_loc(peak)
+
+
+def test_rolling_sharpe_matches_pandas_rolling(portfolio_values, reference_values):
+    metrics = PortfolioMetrics(portfolio_values)._calculate_all_metrics()
+    excess_returns = reference_values.pct_change().dropna() - RF_DAILY
+    rolling = excess_returns.rolling(TRADING_DAYS_PER_YEAR)
+    rolling_sharpe = (rolling.mean() / rolling.std() * np.sqrt(TRADING_DAYS_PER_YEAR)).dropna()
+
+    assert metrics['rolling_sharpe_mean'] == pytest.approx(rolling_sharpe.mean(), rel=1e-4)
+    assert metrics['rolling_sharpe_min'] == pytest.approx(rolling_sharpe.min(), rel=1e-4)
+    assert metrics['rolling_sharpe_max'] == pytest.approx(rolling_sharpe.max(), rel=1e-4)
+    assert metrics['current_rolling_sharpe'] == pytest.approx(rolling_sharpe.iloc[-1], rel=1e-4)
+
+
+def test_short_series_has_no_rolling_metrics():
+    metrics = PortfolioMetrics(_random_walk(100))._calculate_all_metrics()
+
+    assert np.isnan(metrics['best_year'])
+    assert np.isnan(metrics['worst_year'])
+    assert np.isnan(metrics['rolling_sharpe_mean'])
+    assert np.isnan(metrics['current_rolling_sharpe'])
+    assert not np.isnan(metrics['volatility'])
+
+
+def test_too_few_values_raises():
+    with pytest.raises(ValueError):
+        PortfolioMetrics(_random_walk(1))._calculate_all_metrics()
+
+
+def test_benchmark_metrics_match_pandas(portfolio_values):
+    benchmark_values = _random_walk(len(portfolio_values), seed=1)
+    metrics = PortfolioMetrics(portfolio_values, benchmark_values)._calculate_all_metrics()
+    returns = portfolio_values.astype(np.float32).astype(np.float64).pct_change().dropna()
+    benchmark_returns = benchmark_values.astype(np.float32).astype(np.float64).pct_change().dropna()
+
+    assert metrics['beta'] == pytest.approx(returns.cov(benchmark_returns) / benchmark_returns.var(), rel=1e-5)
+    assert metrics['correlation'] == pytest.approx(returns.corr(benchmark_returns), rel=1e-5)
+    active_returns = returns - benchmark_returns
+    assert metrics['tracking_error'] == pytest.approx(active_returns.std() * np.sqrt(TRADING_DAYS_PER_YEAR), rel=1e-5)
+
+
+def test_strided_float32_series_is_accepted(portfolio_values):
+    strided = portfolio_values.astype(np.float32)[::2]
+    benchmark = _random_walk(len(portfolio_values), seed=1).astype(np.float32)[::2]
+    assert not strided.to_numpy().flags.c_contiguous
+
+    metrics = PortfolioMetrics(strided, benchmark)._calculate_all_metrics()
+
+    expected = PortfolioMetrics(strided.copy(), benchmark.copy())._calculate_all_metrics()
+    assert metrics['max_drawdown'] == pytest.approx(expected['max_drawdown'])
+    assert metrics['beta'] == pytest.approx(expected['beta'])
+
+
+def test_read_only_values_are_accepted(portfolio_values):
+    values = portfolio_values.astype(np.float32)
+    values_array = values.to_numpy()
+    values_array.flags.writeable = False
+
+    read_only = pd.Series(values_array, index=values.index, copy=False)
+    assert not read_only.to_numpy().flags.writeable
+
+    metrics = PortfolioMetrics(read_only)._calculate_all_metrics()
+
+    expected = PortfolioMetrics(values.copy())._calculate_all_metrics()
+    assert metrics['max_drawdown'] == pytest.approx(expected['max_drawdown'])
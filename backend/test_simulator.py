@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import ContributionFrequency, RebalanceFrequency
+from simulator import PortfolioSimulator, _frequency_mask, run_backtest
+
+
+def _price_data(n_days: int = 800, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2018-01-01', periods=n_days)
+    return pd.DataFrame({
+        f"{symbol}_Close": 100 * np.cumprod(1 + rng.normal(0.0003, 0.01, n_days))
+        for symbol in ('SPY', 'BND', 'VNQ')
+    }, index=index).astype(np.float32)
+
+
+def _reference_backtest(prices: pd.DataFrame, weights: np.ndarray, contribution: float,
+                        contrib_days: set, rebal_days: set, initial: float) -> np.ndarray:
+    """plain row-by-row backtest to check the kernel against"""
+    prices = prices.astype(np.float64)
+    shares = initial * weights / prices.iloc[0].to_numpy()
+    values = []
+    for day, row in prices.iterrows():
+        row_prices = row.to_numpy()
+        if day != prices.index[0]:
+            if day in contrib_days:
+                shares = shares + contribution * weights / row_prices
+            if day in rebal_days:
+                shares = (shares * row_prices).sum() * weights / row_prices
+        values.append((shares * row_prices).sum())
+    return np.array(values)
+
+
+def test_buy_and_hold_matches_price_growth():
+    data = _price_data()
+    prices = data.to_numpy()
+    weights = np.array([0.5, 0.3, 0.2])
+    no_days = np.zeros(len(data), dtype=np.bool_)
+
+    values = run_backtest(prices, weights, 0.0, no_days, no_days, 10000.0)
+
+    expected = 10000.0 * (prices.astype(np.float64) / prices[0] * weights).sum(axis=1)
+    np.testing.assert_allclose(values, expected, rtol=1e-9)
+
+
+def test_contributions_and_rebalancing_match_row_loop():
+    data = _price_data()
+    weights = np.array([0.5, 0.3, 0.2])
+    months = data.index.to_period('M')
+    quarters = data.index.to_period('Q')
+    contrib_mask = np.r_[True, months[1:] != months[:-1]]
+    rebal_mask = np.r_[True, quarters[1:] != quarters[:-1]]
+
+    values = run_backtest(data.to_numpy(), weights, 500.0, contrib_mask, rebal_mask, 10000.0)
+
+    expected = _reference_backtest(
+        data, weights, 500.0, set(data.index[contrib_mask]), set(data.index[rebal_mask]), 10000.0,
+    )
+    np.testing.assert_allclose(values, expected, rtol=1e-9)
+
+
+def test_simulator_returns_series_on_price_index():
+    data = _price_data()
+    simulator = PortfolioSimulator(
+        data,
+        {'spy': 0.6, 'bnd': 0.4},
+        initial_investment=10000,
+        contribution_amount=0,
+        contribution_frequency=ContributionFrequency.NONE,
+        rebalance_frequency=RebalanceFrequency.NONE,
+    )
+
+    values = simulator.run()
+
+    assert values.index.equals(data.index)
+    assert values.iloc[0] == pytest.approx(10000)
+
+
+def test_simulator_rejects_bad_allocation_and_missing_symbols():
+    data = _price_data()
+
+    with pytest.raises(ValueError):
+        PortfolioSimulator(data, {'SPY': 0.5, 'BND': 0.4})
+
+    with pytest.raises(ValueError):
+        PortfolioSimulator(data, {'SPY': 0.5, 'VXUS': 0.5}).run()
+
+
+@pytest.mark.parametrize('frequency, period', [
+    (RebalanceFrequency.MONTHLY, 'M'),
+    (RebalanceFrequency.QUARTERLY, 'Q'),
+    (RebalanceFrequency.YEARLY, 'Y'),
+    (ContributionFrequency.MONTHLY, 'M'),
+])
+def test_frequency_mask_marks_first_day_of_each_period(frequency, period):
+    index = _price_data(n_days=1000).index
+    periods = index.to_period(period)
+
+    mask = _frequency_mask(index, frequency)
+
+    expected = np.r_[True, periods[1:] != periods[:-1]]
+    np.testing.assert_array_equal(mask, expected)
+
+
+def test_frequency_mask_handles_none_empty_and_tz_aware_index():
+    index = _price_data(n_days=300).index
+
+    assert not _frequency_mask(index, RebalanceFrequency.NONE).any()
+    assert len(_frequency_mask(index[:0], RebalanceFrequency.MONTHLY)) == 0
+
+    np.testing.assert_array_equal(
+        _frequency_mask(index.tz_localize('UTC'), RebalanceFrequency.MONTHLY),
+        _frequency_mask(index, RebalanceFrequency.MONTHLY),
+    )